@@ -3,13 +3,22 @@ Google Fact Check Tool API Integration
 API Documentation: https://developers.google.com/fact-check/tools/api/reference/rest
 """
 import os
+import time
+import asyncio
 import httpx
+from functools import lru_cache
 from typing import Optional
 
 # API Configuration - Key must be set in .env
 FACT_CHECK_API_KEY = os.getenv("GOOGLE_FACT_CHECK_API_KEY", "")
 FACT_CHECK_BASE_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
 
+# Cache kết quả theo (query, language_code) -> (timestamp, results):
+# cùng claim được tra lại (tool_executor, CRITIC/JUDGE, retry) trong 1h không tốn thêm request
+_FACT_CHECK_CACHE: dict = {}
+_FACT_CHECK_CACHE_TTL = 3600.0
+_FACT_CHECK_CACHE_MAX_SIZE = 1024
+
 
 async def call_google_fact_check(query: str, language_code: str = "en") -> list:
     """
@@ -25,61 +34,83 @@ async def call_google_fact_check(query: str, language_code: str = "en") -> list:
         print("[FACT-CHECK] ⚠️ API key not configured")
         return []
     
+    cache_key = (query, language_code)
+    cached = _FACT_CHECK_CACHE.get(cache_key)
+    if cached and time.monotonic() - cached[0] < _FACT_CHECK_CACHE_TTL:
+        print(f"[FACT-CHECK] Cache HIT ({len(cached[1])} fact checks)")
+        return list(cached[1])
+    
     # Generate multiple search queries
     queries = _generate_fact_check_queries(query)
     
+    async with httpx.AsyncClient(timeout=15.0) as client:
+        # Gửi song song tất cả query (trước đây tuần tự) → latency = query chậm nhất
+        responses = await asyncio.gather(
+            *(_fetch_fact_check_claims(client, q, lang) for q, lang in queries[:6])  # Max 6 queries (3 EN + 3 VN)
+        )
+    
     all_results = []
     seen_urls = set()
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        for q, lang in queries[:6]:  # Max 6 queries (3 EN + 3 VN)
-            try:
-                params = {
-                    "key": FACT_CHECK_API_KEY,
-                    "query": q,
-                    "languageCode": lang,
-                    "pageSize": 5
-                }
+    # Gộp theo đúng thứ tự query để dedup giống như khi chạy tuần tự
+    for (q, lang), claims in zip(queries, responses):
+        for claim in claims or ():
+            claim_text = claim.get("text", "")
+            
+            for review in claim.get("claimReview", []):
+                url = review.get("url", "")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
                 
-                response = await client.get(FACT_CHECK_BASE_URL, params=params)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    claims = data.get("claims", [])
-                    
-                    for claim in claims:
-                        claim_text = claim.get("text", "")
-                        
-                        for review in claim.get("claimReview", []):
-                            url = review.get("url", "")
-                            if url in seen_urls:
-                                continue
-                            seen_urls.add(url)
-                            
-                            result = {
-                                "claim": claim_text,
-                                "publisher": review.get("publisher", {}).get("name", "Unknown"),
-                                "url": url,
-                                "rating": review.get("textualRating", ""),
-                                "title": review.get("title", ""),
-                                "review_date": review.get("reviewDate", ""),
-                                "language": review.get("languageCode", lang),
-                                "matched_query": q
-                            }
-                            all_results.append(result)
-                            
-            except Exception as e:
-                print(f"[FACT-CHECK] Query error: {e}")
-                continue
+                result = {
+                    "claim": claim_text,
+                    "publisher": review.get("publisher", {}).get("name", "Unknown"),
+                    "url": url,
+                    "rating": review.get("textualRating", ""),
+                    "title": review.get("title", ""),
+                    "review_date": review.get("reviewDate", ""),
+                    "language": review.get("languageCode", lang),
+                    "matched_query": q
+                }
+                all_results.append(result)
     
     if all_results:
         print(f"[FACT-CHECK] ✓ Found {len(all_results)} fact checks")
     else:
         print(f"[FACT-CHECK] No fact checks found")
     
+    # Không cache khi có query lỗi (None) → lần sau thử lại
+    if None not in responses:
+        if len(_FACT_CHECK_CACHE) >= _FACT_CHECK_CACHE_MAX_SIZE:
+            _FACT_CHECK_CACHE.pop(next(iter(_FACT_CHECK_CACHE)))
+        _FACT_CHECK_CACHE[cache_key] = (time.monotonic(), all_results)
+        return list(all_results)
+    
     return all_results
 
 
+async def _fetch_fact_check_claims(client: httpx.AsyncClient, q: str, lang: str) -> list | None:
+    """1 request tới Fact Check API. Trả list claims ([] nếu HTTP lỗi), None nếu exception."""
+    try:
+        params = {
+            "key": FACT_CHECK_API_KEY,
+            "query": q,
+            "languageCode": lang,
+            "pageSize": 5
+        }
+        
+        response = await client.get(FACT_CHECK_BASE_URL, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("claims", [])
+        return []
+    except Exception as e:
+        print(f"[FACT-CHECK] Query error: {e}")
+        return None
+
+
 def _generate_fact_check_queries(text: str) -> list:
     """
     Generate multiple search queries from claim text.
@@ -181,6 +212,16 @@ def _extract_english_query(text: str) -> str:
     return ""
 
 
+# TRUE indicators
+_TRUE_RATING_KEYWORDS = ("true", "correct", "accurate", "đúng", "chính xác", "thật")
+# FALSE indicators
+_FALSE_RATING_KEYWORDS = ("false", "fake", "incorrect", "sai", "giả", "bịa", "misleading", "pants on fire", "hoax")
+# PARTIAL indicators
+_PARTIAL_RATING_KEYWORDS = ("partly", "partial", "mixed", "half", "một phần")
+
+
+# Rating là nhãn text lặp lại rất nhiều ("False", "Misleading"...) → memoize
+@lru_cache(maxsize=512)
 def interpret_fact_check_rating(rating: str) -> tuple[str, int]:
     """
     Interpret fact check rating to conclusion and confidence.
@@ -190,22 +231,15 @@ def interpret_fact_check_rating(rating: str) -> tuple[str, int]:
     """
     rating_lower = rating.lower()
     
-    # TRUE indicators
-    true_keywords = ["true", "correct", "accurate", "đúng", "chính xác", "thật"]
-    # FALSE indicators  
-    false_keywords = ["false", "fake", "incorrect", "sai", "giả", "bịa", "misleading", "pants on fire", "hoax"]
-    # PARTIAL indicators
-    partial_keywords = ["partly", "partial", "mixed", "half", "một phần"]
-    
-    for kw in false_keywords:
+    for kw in _FALSE_RATING_KEYWORDS:
         if kw in rating_lower:
             return ("TIN GIẢ", 90)
     
-    for kw in true_keywords:
+    for kw in _TRUE_RATING_KEYWORDS:
         if kw in rating_lower:
             return ("TIN THẬT", 90)
     
-    for kw in partial_keywords:
+    for kw in _PARTIAL_RATING_KEYWORDS:
         if kw in rating_lower:
             return ("TIN GIẢ", 70)  # Partial = leaning fake
     
@@ -0,0 +1,118 @@
+# app/llm_cache.py
+"""
+LLM Response Cache
+Cache kết quả CRITIC/JUDGE theo hash(role + prompt + tham số gọi model).
+- In-memory LRU (front) + SQLite trong data/ (opt-in qua LLM_CACHE_PERSIST, giữ qua các lần restart)
+- get/put là async: I/O SQLite chạy trong asyncio.to_thread, không block event loop
+- JUDGE lưu dict ĐÃ PARSE → cache hit bỏ qua cả network lẫn bước parse/regex fallback
+"""
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from typing import Any
+
+LLM_CACHE_DB_PATH = "data/llm_cache.db"
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "").lower() in ("1", "true")  # Mặc định chỉ cache in-memory
+LLM_CACHE_TTL = 24 * 3600.0  # Prompt đã chứa current_date, TTL chỉ để dọn entry cũ
+_MEMORY_MAX_SIZE = 256
+
+# key -> (created_at, JSON string). Lưu chuỗi JSON: mỗi lần get trả object mới, caller sửa thoải mái
+_memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_db_ready = False
+
+
+def make_key(*parts: Any) -> str:
+    """SHA256 của các thành phần (role, prompt, tham số...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        text = part if isinstance(part, str) else json.dumps(part, sort_keys=True, default=str)
+        h.update(text.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    global _db_ready
+    if not _db_ready:
+        os.makedirs(os.path.dirname(LLM_CACHE_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(LLM_CACHE_DB_PATH)
+    if not _db_ready:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                created_at REAL
+            )
+        """)
+        conn.commit()
+        _db_ready = True
+    return conn
+
+
+def _remember(key: str, created_at: float, payload: str) -> None:
+    _memory[key] = (created_at, payload)
+    _memory.move_to_end(key)
+    if len(_memory) > _MEMORY_MAX_SIZE:
+        _memory.popitem(last=False)
+
+
+def _db_get(key: str) -> tuple | None:
+    try:
+        conn = _connect()
+        try:
+            return conn.execute("SELECT created_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[LLM-CACHE] Lỗi đọc cache: {e}")
+        return None
+
+
+def _db_put(key: str, payload: str, created_at: float) -> None:
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, payload, created_at),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[LLM-CACHE] Lỗi ghi cache: {e}")
+
+
+async def get(key: str) -> Any | None:
+    """Trả value đã cache (str hoặc dict) hoặc None nếu chưa có / hết hạn."""
+    entry = _memory.get(key)
+    if entry is None:
+        if not LLM_CACHE_PERSIST:
+            return None
+        entry = await asyncio.to_thread(_db_get, key)
+        if entry is None:
+            return None
+        _remember(key, entry[0], entry[1])
+    else:
+        _memory.move_to_end(key)
+
+    if time.time() - entry[0] > LLM_CACHE_TTL:
+        _memory.pop(key, None)
+        return None
+    return json.loads(entry[1])
+
+
+async def put(key: str, value: Any) -> None:
+    """Lưu value (str hoặc dict JSON-serializable) vào memory (+ SQLite nếu LLM_CACHE_PERSIST)."""
+    try:
+        payload = json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return
+    now = time.time()
+    _remember(key, now, payload)
+    if LLM_CACHE_PERSIST:
+        await asyncio.to_thread(_db_put, key, payload, now)
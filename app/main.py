@@ -33,7 +33,7 @@ from app.feedback import init_feedback_db, log_human_feedback
 # --- Import NEW Agents ---
 from app.agent_planner import load_planner_prompt, create_action_plan
 from app.tool_executor import execute_tool_plan, enrich_plan_with_evidence
-from app.agent_synthesizer import load_synthesis_prompt, load_critic_prompt, execute_final_analysis
+from app.agent_synthesizer import load_synthesis_prompt, load_critic_prompt, load_filter_prompt, execute_final_analysis
 # ------------------------------
 
 # (MODIFIED) Only import detection function
@@ -184,6 +184,7 @@ async def startup_event():
     load_planner_prompt("prompts/planner_prompt_simple.txt")
     load_synthesis_prompt("prompts/synthesis_prompt_simple.txt")
     load_critic_prompt("prompts/critic_prompt_simple.txt")
+    load_filter_prompt()  # Tải lúc startup → request đầu tiên không đọc file trong event loop
     # ---------------------------------
     
     try:
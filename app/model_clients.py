@@ -1,4 +1,5 @@
 import os
+import json
 import asyncio
 from typing import Optional, Awaitable, Callable, List
 
@@ -79,6 +80,7 @@ async def call_cerebras_chat_completion(
     timeout: float = 60.0,
     temperature: float = 0.2,
     system_prompt: Optional[str] = None,
+    response_format: Optional[dict] = None,
 ) -> str:
     """
     Call Cerebras API với multi-key fallback.
@@ -89,6 +91,8 @@ async def call_cerebras_chat_completion(
     - llama-3.3-70b, llama3.1-8b
     - qwen-3-32b, qwen-3-235b-instruct  
     - openai/gpt-oss-120b
+    
+    response_format={"type": "json_object"} bật JSON mode.
     """
     global _cerebras_key_index
     
@@ -108,10 +112,12 @@ async def call_cerebras_chat_completion(
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
+        extra = {"response_format": response_format} if response_format else {}
         completion = client.chat.completions.create(
             messages=messages,
             model=model_name,
             temperature=temperature,
+            **extra,
         )
         
         if not completion.choices:
@@ -166,6 +172,8 @@ async def call_groq_chat_completion(
     timeout: float = 60.0,
     temperature: float = 0.2,
     system_prompt: Optional[str] = None,
+    response_format: Optional[dict] = None,
+    stream_until: Optional[Callable[[], Callable[[str], Optional[str]]]] = None,
 ) -> str:
     """
     Call Groq's chat completion using official Groq SDK với multi-key fallback.
@@ -176,6 +184,11 @@ async def call_groq_chat_completion(
     - qwen/qwen3-32b
     - compound-beta, compound-beta-mini
     - openai/gpt-oss-20b, openai/gpt-oss-safeguard-20b
+    
+    response_format={"type": "json_object"} bật JSON mode.
+    stream_until: bật streaming; factory được gọi lại ở MỖI lần thử (mỗi key) để tạo watcher mới.
+    Watcher nhận từng đoạn (delta) mới của stream, trả về chuỗi khác None → dừng đọc stream
+    (đóng HTTP) và dùng chuỗi đó làm kết quả.
     """
     global _groq_key_index
     
@@ -199,12 +212,27 @@ async def call_groq_chat_completion(
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
+        extra = {"response_format": response_format} if response_format else {}
         try:
+            if stream_until is not None:
+                return _consume_groq_stream(
+                    client.chat.completions.create(
+                        model=model_name,
+                        messages=messages,
+                        temperature=temperature,
+                        stream=True,
+                        **extra,
+                    ),
+                    model_name,
+                )
             completion = client.chat.completions.create(
                 model=model_name,
                 messages=messages,
                 temperature=temperature,
+                **extra,
             )
+        except ModelClientError:
+            raise
         except Exception as e:
             exc_str = str(e).lower()
             if GroqRateLimitError and isinstance(e, GroqRateLimitError):
@@ -222,6 +250,28 @@ async def call_groq_chat_completion(
         
         return content
     
+    def _consume_groq_stream(stream, model_name: str) -> str:
+        watch = stream_until()  # Watcher mới cho mỗi stream: không giữ trạng thái của lần thử trước
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                early = watch(delta)
+                if early is not None:
+                    return early
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        if not parts:
+            raise ModelClientError(f"Groq model '{model_name}' returned empty content.")
+        return "".join(parts)
+    
     errors = []
     # Try all keys before giving up
     for attempt in range(len(GROQ_API_KEYS)):
@@ -261,12 +311,14 @@ async def call_gemini_model(
     prompt: str,
     *,
     timeout: Optional[float] = 30.0,
-    safety_settings: Optional[list] = None,
+    safety_settings: Optional[list | tuple] = None,
     enable_browse: bool = False,
+    response_mime_type: Optional[str] = None,
 ) -> str:
     """
     Call a Gemini model with multi-key fallback.
     Automatically rotates through GEMINI_API_KEYS when hitting rate limits.
+    response_mime_type="application/json" bật JSON mode (chỉ Gemini, không hỗ trợ Gemma).
     """
     global _gemini_key_index
     
@@ -283,6 +335,9 @@ async def call_gemini_model(
             if any(supported in model_name_clean for supported in browse_supported_models):
                 model_kwargs["tools"] = [{"googleSearchRetrieval": {}}]
         
+        if response_mime_type:
+            model_kwargs["generation_config"] = {"response_mime_type": response_mime_type}
+        
         model = genai.GenerativeModel(model_name, **model_kwargs)
         
         if safety_settings is not None:
@@ -578,8 +633,9 @@ async def call_agent_with_capability_fallback(
     temperature: float = 0.2,
     timeout: float = 90.0,
     input_tokens: int = 0,  # For long-form routing
+    expect_json: bool = False,
     **kwargs
-) -> str:
+) -> str | dict:
     """
     Hàm gọi Agent thông minh với cơ chế Fallback dựa trên Năng lực.
     Tự động định tuyến (Routing) sang API phù hợp (Cerebras/Groq/Gemini).
@@ -596,9 +652,12 @@ async def call_agent_with_capability_fallback(
         temperature: Nhiệt độ sinh text
         timeout: Thời gian chờ tối đa
         input_tokens: Số token input (cho long-form routing)
+        expect_json: Bật JSON mode của provider (response_format / response_mime_type)
     
     Returns:
         str: Kết quả từ model
+        dict: Khi expect_json=True và model trả về JSON object hợp lệ
+              (nếu không parse được thì trả về text thô để caller tự xử lý)
     """
     role_key = role.upper()
     candidate_models = AGENT_ROSTER.get(role_key, ["models/gemini-2.5-flash"])
@@ -617,6 +676,11 @@ async def call_agent_with_capability_fallback(
         provider = _detect_provider(model_name)
         print(f"  --> [{priority_label}] {model_name} ({provider})...", end=" ")
         
+        # JSON mode: Cerebras/Groq dùng response_format, Gemini dùng response_mime_type
+        # (Gemma không hỗ trợ JSON mode → gọi bình thường, caller tự parse)
+        json_format = {"type": "json_object"} if expect_json else None
+        json_mime = "application/json" if expect_json and "gemini" in model_name.lower() else None
+        
         try:
             response_text = ""
             
@@ -627,6 +691,7 @@ async def call_agent_with_capability_fallback(
                     system_prompt=system_prompt,
                     temperature=temperature,
                     timeout=timeout,
+                    response_format=json_format,
                 )
             
             elif provider == "groq":
@@ -636,6 +701,7 @@ async def call_agent_with_capability_fallback(
                     system_prompt=system_prompt,
                     temperature=temperature,
                     timeout=timeout,
+                    response_format=json_format,
                 )
             
             elif provider == "gemini":
@@ -644,6 +710,7 @@ async def call_agent_with_capability_fallback(
                     model_name,
                     full_prompt,
                     timeout=timeout,
+                    response_mime_type=json_mime,
                 )
             
             else:
@@ -654,6 +721,13 @@ async def call_agent_with_capability_fallback(
                 )
             
             print("OK ✓")
+            if expect_json:
+                try:
+                    parsed = json.loads(response_text)
+                    if isinstance(parsed, dict):
+                        return parsed
+                except ValueError:
+                    pass
             return response_text
 
         except RateLimitError as e:
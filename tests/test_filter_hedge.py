@@ -0,0 +1,45 @@
+import asyncio
+
+from app import agent_synthesizer
+
+
+def _fake_models(monkeypatch, delays, started):
+    """Giả lập cascade filter: mỗi model trả tên của nó sau delays[model_name] giây."""
+    async def fake_call(model_name, **kwargs):
+        started.append(model_name)
+        await asyncio.sleep(delays[model_name])
+        return model_name
+
+    monkeypatch.setattr(agent_synthesizer, "call_gemini_model", fake_call)
+    monkeypatch.setattr(agent_synthesizer, "call_groq_chat_completion", fake_call)
+
+
+def test_primary_wins_within_hedge_delay(monkeypatch):
+    monkeypatch.setattr(agent_synthesizer, "_FILTER_HEDGE_DELAY", 0.2)
+    started = []
+    _fake_models(monkeypatch, {
+        "models/gemma-3-12b-it": 0.05,
+        "models/gemma-3-4b-it": 0.0,
+        "gemma2-9b-it": 0.0,
+    }, started)
+
+    response, model_used = asyncio.run(agent_synthesizer._hedged_filter_call("system", "user"))
+
+    assert response == "models/gemma-3-12b-it"
+    assert model_used == "gemini/models/gemma-3-12b-it"
+    assert started == ["models/gemma-3-12b-it"]  # Không hedge sang model phụ
+
+
+def test_hedges_to_next_model_when_primary_is_slow(monkeypatch):
+    monkeypatch.setattr(agent_synthesizer, "_FILTER_HEDGE_DELAY", 0.05)
+    started = []
+    _fake_models(monkeypatch, {
+        "models/gemma-3-12b-it": 1.0,
+        "models/gemma-3-4b-it": 0.0,
+        "gemma2-9b-it": 0.0,
+    }, started)
+
+    response, model_used = asyncio.run(agent_synthesizer._hedged_filter_call("system", "user"))
+
+    assert model_used == "gemini/models/gemma-3-4b-it"
+    assert started[:2] == ["models/gemma-3-12b-it", "models/gemma-3-4b-it"]
@@ -0,0 +1,30 @@
+from app.agent_synthesizer import _FilteredArrayWatcher
+
+RESPONSE = '{"filtered" : [{"i": 0, "s": "a]b\\"}", "info": "[x]"}, {"i": 2}], "removed": ["y"]}'
+EXPECTED = '{"filtered":[{"i": 0, "s": "a]b\\"}", "info": "[x]"}, {"i": 2}]}'
+
+
+def _feed(chunks):
+    watch = _FilteredArrayWatcher()
+    for chunk in chunks:
+        early = watch(chunk)
+        if early is not None:
+            return early
+    return None
+
+
+def test_stops_when_filtered_array_closes():
+    assert _feed([RESPONSE]) == EXPECTED
+
+
+def test_handles_every_chunk_boundary():
+    for cut in range(1, len(RESPONSE)):
+        assert _feed([RESPONSE[:cut], RESPONSE[cut:]]) == EXPECTED, cut
+
+
+def test_single_character_chunks():
+    assert _feed(list(RESPONSE)) == EXPECTED
+
+
+def test_unfinished_array_returns_none():
+    assert _feed([RESPONSE[:30]]) is None
@@ -0,0 +1,57 @@
+import asyncio
+from collections import OrderedDict
+
+from app import agent_synthesizer, llm_cache
+
+
+def _count_model_calls(monkeypatch, response):
+    calls = []
+
+    async def fake_call(role, prompt, **kwargs):
+        calls.append(role)
+        return response
+
+    monkeypatch.setattr(agent_synthesizer, "call_agent_with_capability_fallback", fake_call)
+    monkeypatch.setattr(llm_cache, "_memory", OrderedDict())
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PERSIST", False)
+    return calls
+
+
+def test_judge_second_run_hits_cache(monkeypatch):
+    calls = _count_model_calls(monkeypatch, '{"conclusion": "TIN THẬT", "confidence_score": 90}')
+
+    async def run_twice():
+        first = await agent_synthesizer._cached_agent_call("JUDGE", "prompt", 0.0, 1.0, expect_json=True)
+        second = await agent_synthesizer._cached_agent_call("JUDGE", "prompt", 0.0, 1.0, expect_json=True)
+        return first, second
+
+    first, second = asyncio.run(run_twice())
+
+    assert calls == ["JUDGE"]
+    assert first == second == {"conclusion": "TIN THẬT", "confidence_score": 90}
+
+
+def test_sampled_call_is_not_cached(monkeypatch):
+    calls = _count_model_calls(monkeypatch, "critic report")
+
+    async def run_twice():
+        for _ in range(2):
+            await agent_synthesizer._cached_agent_call("CRITIC", "prompt", 0.5, 1.0)
+
+    asyncio.run(run_twice())
+
+    assert calls == ["CRITIC", "CRITIC"]
+
+
+def test_disk_tier_survives_memory_reset(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "_memory", OrderedDict())
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PERSIST", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DB_PATH", str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(llm_cache, "_db_ready", False)
+
+    async def roundtrip():
+        await llm_cache.put("key", {"a": 1})
+        llm_cache._memory.clear()
+        return await llm_cache.get("key")
+
+    assert asyncio.run(roundtrip()) == {"a": 1}
@@ -0,0 +1,46 @@
+import asyncio
+
+from app import agent_synthesizer, search
+
+
+def _fake_search(monkeypatch, hits, called):
+    """Giả lập Google CSE: query q trả về hits[q] kết quả."""
+    def fake_call(query, site):
+        called.append(query)
+        return [{"q": query, "n": n} for n in range(hits[query])]
+
+    monkeypatch.setattr(search, "call_google_search", fake_call)
+
+
+def test_second_query_skipped_when_first_is_enough(monkeypatch):
+    called = []
+    _fake_search(monkeypatch, {"a": 7, "b": 3}, called)
+
+    evidence = asyncio.run(agent_synthesizer._parallel_google_search(["a", "b"]))
+
+    assert called == ["a"]  # Không tốn quota cho query thứ 2
+    assert [e["q"] for e in evidence] == ["a"] * 5
+
+
+def test_second_query_runs_when_first_is_short(monkeypatch):
+    called = []
+    searched = set()
+    _fake_search(monkeypatch, {"A": 2, "B": 4}, called)
+
+    evidence = asyncio.run(agent_synthesizer._parallel_google_search(["A", "B"], searched=searched))
+
+    assert called == ["A", "B"]
+    assert [e["q"] for e in evidence] == ["A", "A", "B", "B", "B", "B"]
+    assert searched == {"a", "b"}
+
+
+def test_parallel_wave_only_issues_needed_queries(monkeypatch):
+    called = []
+    _fake_search(monkeypatch, {"a": 2, "b": 2, "c": 2, "d": 2}, called)
+
+    # Cần 6 kết quả, mỗi query tối đa 2 → đợt đầu chạy song song đúng 3 query, không gọi "d"
+    evidence = asyncio.run(agent_synthesizer._parallel_google_search(
+        ["a", "b", "c", "d"], per_query=2, max_items=6))
+
+    assert sorted(called) == ["a", "b", "c"]
+    assert len(evidence) == 6
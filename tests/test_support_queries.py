@@ -0,0 +1,55 @@
+from app import agent_synthesizer, search
+
+CLAIM = "Tổng thống Mỹ gặp Chủ tịch Trung Quốc tại Bắc Kinh"
+EN = "US President meets Chinese President in Beijing"
+
+
+def _international(monkeypatch, flag, en_text=EN):
+    monkeypatch.setattr(search, "_is_international_event", lambda text: flag)
+    monkeypatch.setattr(search, "_extract_english_query", lambda text: en_text)
+
+
+def test_support_queries_international(monkeypatch):
+    _international(monkeypatch, True)
+    assert agent_synthesizer._support_search_queries(CLAIM) == [
+        f"{CLAIM} tin tức chính thống",
+        f"{EN} confirmed Reuters AP",
+        f"{EN} official news",
+    ]
+
+
+def test_support_queries_domestic(monkeypatch):
+    _international(monkeypatch, False)
+    assert agent_synthesizer._support_search_queries(CLAIM) == [
+        f"{CLAIM} tin tức chính thống",
+        f"{CLAIM} official news",
+    ]
+
+
+def test_support_queries_short_english_text_skipped(monkeypatch):
+    _international(monkeypatch, True, en_text="US news")
+    assert agent_synthesizer._support_search_queries(CLAIM) == [f"{CLAIM} tin tức chính thống"]
+
+
+def test_counter_queries_international(monkeypatch):
+    _international(monkeypatch, True)
+    assert agent_synthesizer._counter_search_queries(CLAIM) == [
+        f"{CLAIM} tin tức chính thống",
+        f"{EN} confirmed official",
+        f"{EN} news Reuters AP",
+    ]
+
+
+def test_counter_queries_domestic(monkeypatch):
+    _international(monkeypatch, False)
+    assert agent_synthesizer._counter_search_queries(CLAIM) == [
+        f"{CLAIM} tin tức chính thống",
+        f"{CLAIM} Reuters AFP BBC",
+    ]
+
+
+def test_fallback_queries():
+    assert [CLAIM + suffix for suffix in agent_synthesizer._FALLBACK_QUERY_SUFFIXES] == [
+        f"{CLAIM} fact check",
+        f"{CLAIM} news",
+    ]